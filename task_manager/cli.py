@@ -19,133 +19,456 @@ import os
 import sys
 import io
 import json
+import functools
 from datetime import datetime
 
-# Force UTF-8 encoding for Windows console
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='ignore')
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Control whether emojis are shown
 USE_EMOJI = os.getenv("USE_EMOJI", "1") == "1"
 
-def safe_print(msg: str):
-    """Print message safely with optional emoji support."""
-    if not USE_EMOJI:
-        msg = msg.encode("ascii", "ignore").decode()
-    print(msg)
+# Status message prefixes, resolved once so messages need no per-call stripping
+_OK = "✅" if USE_EMOJI else ""
+_EDIT = "✏️" if USE_EMOJI else ""
+_DEL = "🗑️" if USE_EMOJI else ""
+_WARN = "⚠️" if USE_EMOJI else ""
+_EMPTY = "📂" if USE_EMOJI else ""
+
+# Strings from input() can hold lone surrogates (undecodable terminal bytes),
+# which are not valid UTF-8; those records are written \u-escaped instead
+def _dumps_ascii(obj):
+    return json.dumps(obj, separators=(",", ":")).encode("ascii")
+
+if orjson is not None:
+    def _loads(data):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson rejects escaped lone surrogates; stdlib json accepts them
+            return json.loads(data)
+
+    def _dumps(obj):
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            return _dumps_ascii(obj)
+else:
+    _loads = json.loads
+
+    def _dumps(obj):
+        try:
+            return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        except UnicodeEncodeError:
+            return _dumps_ascii(obj)
+
+@functools.lru_cache(maxsize=1)
+def _numba_filter():
+    """Import Numba and compile the status filter kernel, or return None.
+
+    Only called once a list is large enough to benefit, so small listings
+    never pay the numpy/numba import cost. The result (including a failure)
+    is cached for the rest of the process.
+    """
+    try:
+        import numpy as np
+        from numba import njit
+        from numba.core.errors import NumbaError
+    except ImportError:
+        return None
+
+    try:
+        # An explicit signature compiles eagerly, so failures surface here
+        @njit("int64[:](int64[:], uint8[:], int64)", cache=True)
+        def filter_status(ids, codes, target):
+            return ids[codes == target]
+    except NumbaError:
+        return None
+    return np, filter_status
+
+def _enable_utf8_stdout():
+    """Rewrap stdout as UTF-8 (Windows consoles), unless it already is."""
+    encoding = (sys.stdout.encoding or "").lower()
+    if encoding in ("utf-8", "utf8") or not hasattr(sys.stdout, "buffer"):
+        return
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='ignore')
 
 def current_local_time():
     """Return current local time as a formatted string."""
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
+STATUSES = ("todo", "in-progress", "done")
+_STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+_UNKNOWN_STATUS = 255
+
+# Below this many tasks, Numba dispatch costs more than the Python filter
+NUMBA_THRESHOLD = 1024
+
+_START_TEXT = "\n".join([
+    "\n👋 Welcome to Task Manager CLI!",
+    "Easily track your tasks with statuses: todo, in-progress, and done.",
+    "\n👉 Quickstart examples:",
+    "   add Buy groceries",
+    "   list",
+    "Type 'help' to see available commands, 'exit' to quit.\n",
+]) + "\n"
+
+_HELP_TEXT = "\n".join([
+    "\n📖 Task Manager CLI - Commands Reference\n",
+    "General:",
+    "  start                   Show greeting and quickstart guide",
+    "  help                    Show this list of commands",
+    "  exit, quit              Exit the application\n",
+    "Tasks:",
+    "  add <description>       Add a new task",
+    "  update <id> <desc>      Update task description",
+    "  delete <id>             Delete a task by ID\n",
+    "Status updates:",
+    "  mark-in-progress <id>   Mark task as 'in-progress'",
+    "  mark-done <id>          Mark task as 'done'\n",
+    "Listing:",
+    "  list                    Show all tasks",
+    "  list todo               Show only 'todo' tasks",
+    "  list in-progress        Show only 'in-progress' tasks",
+    "  list done               Show only 'done' tasks\n",
+]) + "\n"
+
+# Rewrite the log once it holds this many times more records than live tasks
+COMPACT_FACTOR = 2
+# ...but never bother compacting a log shorter than this
+COMPACT_MIN_RECORDS = 64
+
 class TaskManager:
-    """A simple task manager that stores tasks in a JSON file."""
+    """A simple task manager that stores tasks in a JSON Lines log.
+
+    Every mutation appends a single ``add``, ``upd`` or ``del`` record to the
+    file; loading replays the log, and :meth:`compact` rewrites it once it has
+    grown well past the number of live tasks.
+    """
 
     def __init__(self, filename="tasks.json"):
         self.filename = filename
-        self.tasks = self.load_tasks()
+        self._log = None
+        self._log_records = 0
+        self._next_id = 1
+        self._legacy = False
+        self._corrupt = False
+        self._arrays = None
+
+    @functools.cached_property
+    def tasks(self):
+        """Live tasks keyed by id, loaded from disk on first access."""
+        return self.load_tasks()
 
     # ------------------------------------------------------------------
     # File Handling
     # ------------------------------------------------------------------
     def load_tasks(self):
+        """Replay the task log into a dict of tasks keyed by id."""
+        self._log_records = 0
+        self._next_id = 1
+        self._legacy = False
+        self._corrupt = False
+        # A missing file is just an empty log; the first mutation creates it
         if not os.path.exists(self.filename):
-            print(f"[INFO] {self.filename} not found. Creating a new one.")
-            with open(self.filename, "w", encoding="utf-8") as f:
-                json.dump([], f, indent=4)
-            return []
+            return {}
+
+        with open(self.filename, "rb") as f:
+            data = f.read()
 
-        with open(self.filename, "r", encoding="utf-8") as f:
+        # Legacy format: the whole task list stored as one JSON array.
+        # It is converted on the first mutation, so reading never writes.
+        if data.lstrip().startswith(b"["):
+            self._legacy = True
+            tasks = {}
+            duplicates = []
             try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                print(f"[WARN] {self.filename} is corrupted. Resetting.")
-                with open(self.filename, "w", encoding="utf-8") as f:
-                    json.dump([], f, indent=4)
-                return []
+                for task in _loads(data):
+                    if task["id"] in tasks:
+                        duplicates.append(task)
+                    else:
+                        tasks[task["id"]] = task
+            except (ValueError, KeyError, TypeError):
+                print(f"[WARN] {self.filename} is corrupted. "
+                      f"It will be kept as a .corrupt backup on the next change.")
+                self._corrupt = True
+                tasks = {}
+                duplicates = []
+            self._next_id = max(tasks, default=0) + 1
+            # Old versions numbered tasks len(tasks) + 1, which repeats ids
+            # after a delete; renumber the later copies instead of dropping them
+            for task in duplicates:
+                print(f"[WARN] Duplicate task ID={task['id']} in {self.filename}. "
+                      f"Renumbered to ID={self._next_id}.")
+                task["id"] = self._next_id
+                tasks[task["id"]] = task
+                self._next_id += 1
+            return tasks
+
+        tasks = {}
+        for line in data.splitlines():
+            if not line.strip():
+                continue
+            try:
+                # ValueError covers JSONDecodeError and UnicodeDecodeError on a
+                # torn line; the rest come from records with the wrong shape
+                self._replay(tasks, _loads(line))
+            except (ValueError, KeyError, TypeError, AttributeError):
+                print(f"[WARN] Skipping corrupted record in {self.filename}.")
+                continue
+            self._log_records += 1
+        return tasks
+
+    def _replay(self, tasks, record):
+        """Apply one log record to ``tasks``, raising before any change if it is malformed."""
+        op = record.get("op")
+        # Ids of deleted tasks are not handed out again: the counter is
+        # the highest id ever added, carried across compaction by "meta"
+        if op == "meta":
+            self._next_id = max(self._next_id, int(record["next_id"]))
+        elif op == "add":
+            task = record["task"]
+            task_id = task["id"]
+            next_id = max(self._next_id, task_id + 1)
+            tasks[task_id] = task
+            self._next_id = next_id
+        elif op == "upd":
+            fields = dict(record["fields"])
+            task = tasks.get(record["id"])
+            if task is not None:
+                task.update(fields)
+        elif op == "del":
+            tasks.pop(record["id"], None)
 
     def save_tasks(self):
-        with open(self.filename, "w", encoding="utf-8") as f:
-            json.dump(self.tasks, f, indent=4)
+        """Rewrite the log from scratch: the id counter, then one ``add`` per live task."""
+        self._write_log(self.tasks)
+
+    def compact(self):
+        """Rewrite the log if it has grown well past the number of live tasks."""
+        if self._log_records > max(COMPACT_MIN_RECORDS, COMPACT_FACTOR * len(self.tasks)):
+            self.save_tasks()
+
+    def close(self):
+        """Close the append handle on the task log, if open."""
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def _write_log(self, tasks):
+        # Write the new log beside the old one and swap it in atomically,
+        # so an interrupted rewrite never leaves a truncated file behind
+        self.close()
+        if self._corrupt:
+            # Never overwrite a file we could not read, nor an earlier backup
+            backup = self.filename + ".corrupt"
+            n = 0
+            while os.path.exists(backup):
+                n += 1
+                backup = f"{self.filename}.corrupt.{n}"
+            os.replace(self.filename, backup)
+            print(f"[INFO] Unreadable {self.filename} kept as {backup}.")
+            self._corrupt = False
+        self._legacy = False
+        tmp = self.filename + ".tmp"
+        records = [{"op": "meta", "next_id": self._next_id}]
+        records.extend({"op": "add", "task": t} for t in tasks.values())
+        data = b"".join(self._encode(r) for r in records)
+        with open(tmp, "wb") as f:
+            f.write(data)
+            # Data must be on disk before the rename, or a power loss can
+            # leave the new name pointing at an empty file
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.filename)
+        self._log_records = len(records)
+
+    def _append(self, line):
+        """Append one encoded record; callers encode before changing ``self.tasks``."""
+        self._arrays = None
+        if self._legacy:
+            # self.tasks already includes this change; rewriting converts the file
+            self.save_tasks()
+            return
+        if self._log is None:
+            # Unbuffered: each record goes to disk in a single write() call
+            self._log = open(self.filename, "ab", buffering=0)
+            # Terminate a record torn by a crash so ours starts on its own line
+            if self._log.tell() and not self._ends_with_newline():
+                self._log.write(b"\n")
+        self._log.write(line)
+        self._log_records += 1
+        self.compact()
+
+    def _ends_with_newline(self):
+        with open(self.filename, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    @staticmethod
+    def _encode(record):
+        return _dumps(record) + b"\n"
 
     # ------------------------------------------------------------------
     # Command Implementations
     # ------------------------------------------------------------------
     def show_start(self):
-        print("\n👋 Welcome to Task Manager CLI!")
-        print("Easily track your tasks with statuses: todo, in-progress, and done.")
-        print("\n👉 Quickstart examples:")
-        print("   add Buy groceries")
-        print("   list")
-        print("Type 'help' to see available commands, 'exit' to quit.\n")
+        sys.stdout.write(_START_TEXT)
 
     def show_help(self):
-        print("\n📖 Task Manager CLI - Commands Reference\n")
-        print("General:")
-        print("  start                   Show greeting and quickstart guide")
-        print("  help                    Show this list of commands")
-        print("  exit, quit              Exit the application\n")
-        print("Tasks:")
-        print("  add <description>       Add a new task")
-        print("  update <id> <desc>      Update task description")
-        print("  delete <id>             Delete a task by ID\n")
-        print("Status updates:")
-        print("  mark-in-progress <id>   Mark task as 'in-progress'")
-        print("  mark-done <id>          Mark task as 'done'\n")
-        print("Listing:")
-        print("  list                    Show all tasks")
-        print("  list todo               Show only 'todo' tasks")
-        print("  list in-progress        Show only 'in-progress' tasks")
-        print("  list done               Show only 'done' tasks\n")
+        sys.stdout.write(_HELP_TEXT)
 
     def add_task(self, description):
+        tasks = self.tasks  # loading the log also sets _next_id
         now = current_local_time()
+        new_id = self._next_id
         new_task = {
-            "id": len(self.tasks) + 1,
+            "id": new_id,
             "description": description,
             "status": "todo",
             "created_at": now,
             "updated_at": '',
         }
-        self.tasks.append(new_task)
-        self.save_tasks()
-        safe_print(f"✅ Task added successfully (ID: {new_task['id']}) at {now}")
+        line = self._encode({"op": "add", "task": new_task})
+        self._next_id += 1
+        tasks[new_id] = new_task
+        self._append(line)
+        print(f"{_OK} Task added successfully (ID: {new_task['id']}) at {now}")
 
     def update_task(self, task_id, description):
-        for task in self.tasks:
-            if task["id"] == task_id:
-                task["description"] = description
-                task["updated_at"] = current_local_time()
-                safe_print(f"✏️ Task {task_id} updated at {task['updated_at']}.")
-                self.save_tasks()
-                return
-        safe_print(f"⚠️ No task found with ID={task_id}")
+        task = self.tasks.get(task_id)
+        if task is None:
+            print(f"{_WARN} No task found with ID={task_id}")
+            return
+        fields = {"description": description, "updated_at": current_local_time()}
+        line = self._encode({"op": "upd", "id": task_id, "fields": fields})
+        task.update(fields)
+        print(f"{_EDIT} Task {task_id} updated at {task['updated_at']}.")
+        self._append(line)
 
     def delete_task(self, task_id):
-        before = len(self.tasks)
-        self.tasks = [t for t in self.tasks if t["id"] != task_id]
-        if len(self.tasks) < before:
-            safe_print(f"🗑️ Task {task_id} deleted.")
-            self.save_tasks()
-        else:
-            safe_print(f"⚠️ No task found with ID={task_id}")
+        if task_id not in self.tasks:
+            print(f"{_WARN} No task found with ID={task_id}")
+            return
+        line = self._encode({"op": "del", "id": task_id})
+        del self.tasks[task_id]
+        print(f"{_DEL} Task {task_id} deleted.")
+        self._append(line)
 
     def mark_task(self, task_id, status):
-        for task in self.tasks:
-            if task["id"] == task_id:
-                task["status"] = status
-                task["updated_at"] = current_local_time()
-                safe_print(f"✅ Task {task_id} marked as {status} at {task['updated_at']}.")
-                self.save_tasks()
-                return
-        safe_print(f"⚠️ No task found with ID={task_id}")
+        task = self.tasks.get(task_id)
+        if task is None:
+            print(f"{_WARN} No task found with ID={task_id}")
+            return
+        fields = {"status": status, "updated_at": current_local_time()}
+        line = self._encode({"op": "upd", "id": task_id, "fields": fields})
+        task.update(fields)
+        print(f"{_OK} Task {task_id} marked as {status} at {task['updated_at']}.")
+        self._append(line)
+
+    def _filter_compiled(self, status):
+        """Filter by status with the Numba kernel, or return None if unavailable."""
+        # Statuses outside STATUSES (hand-edited tasks) share one code in the
+        # arrays, so only known statuses can be told apart by the kernel
+        if status not in _STATUS_CODES or len(self.tasks) <= NUMBA_THRESHOLD:
+            return None
+        kernel = _numba_filter()
+        if kernel is None:
+            return None
+        np, filter_status = kernel
+        if self._arrays is None:
+            # Parallel id/status arrays, rebuilt after the next mutation
+            self._arrays = (
+                np.fromiter(self.tasks, dtype=np.int64, count=len(self.tasks)),
+                np.fromiter(
+                    (_STATUS_CODES.get(t["status"], _UNKNOWN_STATUS) for t in self.tasks.values()),
+                    dtype=np.uint8,
+                    count=len(self.tasks),
+                ),
+            )
+        ids = filter_status(*self._arrays, _STATUS_CODES[status])
+        return [self.tasks[i] for i in ids.tolist()]
 
     def list_tasks(self, status=None):
-        filtered = self.tasks if not status else [t for t in self.tasks if t["status"] == status]
+        tasks = self.tasks.values()
+        if not status:
+            filtered = list(tasks)
+        else:
+            filtered = self._filter_compiled(status)
+            if filtered is None:
+                filtered = [t for t in tasks if t["status"] == status]
         if not filtered:
-            safe_print("📂 No tasks found.")
+            print(f"{_EMPTY} No tasks found.")
             return
-        for task in filtered:
-            print(f"[{task['id']}] {task['description']} - {task['status']} (Created: {task['created_at']}, Updated: {task['updated_at']})")
+        # Build the listing up front and emit it with a single write
+        lines = [
+            f"[{task['id']}] {task['description']} - {task['status']} (Created: {task['created_at']}, Updated: {task['updated_at']})"
+            for task in filtered
+        ]
+        lines.append("")
+        sys.stdout.write("\n".join(lines))
+
+    # ------------------------------------------------------------------
+    # Interactive Command Handlers
+    # ------------------------------------------------------------------
+    def _cmd_help(self, args):
+        self.show_help()
+
+    def _cmd_start(self, args):
+        self.show_start()
+
+    def _cmd_add(self, args):
+        if args:
+            self.add_task(" ".join(args))
+        else:
+            print(f"{_WARN} Usage: add <description>")
+
+    def _cmd_update(self, args):
+        if len(args) >= 2 and args[0].isdigit():
+            self.update_task(int(args[0]), " ".join(args[1:]))
+        else:
+            print(f"{_WARN} Usage: update <id> <description>")
+
+    def _cmd_delete(self, args):
+        if args and args[0].isdigit():
+            self.delete_task(int(args[0]))
+        else:
+            print(f"{_WARN} Usage: delete <id>")
+
+    def _cmd_mark_in_progress(self, args):
+        if args and args[0].isdigit():
+            self.mark_task(int(args[0]), "in-progress")
+        else:
+            print(f"{_WARN} Usage: mark-in-progress <id>")
+
+    def _cmd_mark_done(self, args):
+        if args and args[0].isdigit():
+            self.mark_task(int(args[0]), "done")
+        else:
+            print(f"{_WARN} Usage: mark-done <id>")
+
+    def _cmd_list(self, args):
+        if args:
+            if args[0] in STATUSES:
+                self.list_tasks(args[0])
+            else:
+                print(f"{_WARN} Invalid status. Use: {', '.join(STATUSES)}")
+        else:
+            self.list_tasks()
+
+    # Command name -> handler, built once when the class is defined
+    COMMANDS = {
+        "help": _cmd_help,
+        "start": _cmd_start,
+        "add": _cmd_add,
+        "update": _cmd_update,
+        "delete": _cmd_delete,
+        "mark-in-progress": _cmd_mark_in_progress,
+        "mark-done": _cmd_mark_done,
+        "list": _cmd_list,
+    }
 
     # ------------------------------------------------------------------
     # Interactive CLI Loop
@@ -170,51 +493,24 @@ class TaskManager:
             cmd = parts[0]
             args = parts[1:]
 
-            if cmd == "help":
-                self.show_help()
-            elif cmd == "start":
-                self.show_start()
-            elif cmd == "add":
-                if args:
-                    self.add_task(" ".join(args))
-                else:
-                    print("⚠️ Usage: add <description>")
-            elif cmd == "update":
-                if len(args) >= 2 and args[0].isdigit():
-                    self.update_task(int(args[0]), " ".join(args[1:]))
-                else:
-                    print("⚠️ Usage: update <id> <description>")
-            elif cmd == "delete":
-                if args and args[0].isdigit():
-                    self.delete_task(int(args[0]))
-                else:
-                    print("⚠️ Usage: delete <id>")
-            elif cmd == "mark-in-progress":
-                if args and args[0].isdigit():
-                    self.mark_task(int(args[0]), "in-progress")
-                else:
-                    print("⚠️ Usage: mark-in-progress <id>")
-            elif cmd == "mark-done":
-                if args and args[0].isdigit():
-                    self.mark_task(int(args[0]), "done")
-                else:
-                    print("⚠️ Usage: mark-done <id>")
-            elif cmd == "list":
-                if args:
-                    if args[0] in ["todo", "in-progress", "done"]:
-                        self.list_tasks(args[0])
-                    else:
-                        print("⚠️ Invalid status. Use: todo, in-progress, done")
-                else:
-                    self.list_tasks()
+            handler = self.COMMANDS.get(cmd)
+            if handler is None:
+                print(f"{_WARN} Unknown command: {cmd}. Type 'help' to see commands.")
             else:
-                print(f"⚠️ Unknown command: {cmd}. Type 'help' to see commands.")
+                handler(self, args)
+
+        self.close()
 
 
 # ----------------------------------------------------------------------
 # Entry Point
 # ----------------------------------------------------------------------
-if __name__ == "__main__":
+def main():
+    _enable_utf8_stdout()
     cli = TaskManager()
     cli.run()
 
+
+if __name__ == "__main__":
+    main()
+
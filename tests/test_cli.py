@@ -13,6 +13,9 @@ Example:
     # On Windows (PowerShell)
     $env:USE_EMOJI="0"
     pytest -v
+
+Most tests drive TaskManager in-process and capture stdout with capsys;
+test_subprocess_smoke still runs the script end to end.
 """
 
 import os
@@ -22,6 +25,8 @@ import sys
 from pathlib import Path
 import pytest
 
+from task_manager.cli import TaskManager
+
 SCRIPT = Path(__file__).resolve().parent.parent / "task_manager" / "cli.py"
 
 
@@ -41,6 +46,32 @@ def run_cli_interactive(commands, cwd=None):
     return result
 
 
+def run_interactive(path, commands, monkeypatch):
+    """
+    Run the interactive loop in-process on a fresh TaskManager,
+    feeding commands through input() instead of stdin.
+    """
+    feed = iter(list(commands) + ["exit"])
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(feed))
+    TaskManager(filename=str(path)).run()
+
+
+def read_tasks(path):
+    """Replay a JSON Lines task log and return the live tasks in id order."""
+    tasks = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record["op"] == "add":
+                tasks[record["task"]["id"]] = record["task"]
+            elif record["op"] == "upd":
+                tasks[record["id"]].update(record["fields"])
+            elif record["op"] == "del":
+                del tasks[record["id"]]
+            # "meta" records only carry the id counter
+    return [tasks[k] for k in sorted(tasks)]
+
+
 @pytest.fixture
 def temp_tasks(tmp_path, monkeypatch):
     # force CLI to use a temporary tasks.json
@@ -49,80 +80,381 @@ def temp_tasks(tmp_path, monkeypatch):
     return test_file
 
 
-def test_add_task(temp_tasks):
-    result = run_cli_interactive(["add Buy groceries"], cwd=temp_tasks.parent)
+@pytest.fixture
+def manager(temp_tasks):
+    tm = TaskManager(filename=str(temp_tasks))
+    yield tm
+    tm.close()
+
+
+def test_subprocess_smoke(temp_tasks):
+    result = run_cli_interactive(["add Buy groceries", "list"], cwd=temp_tasks.parent)
+
+    assert result.returncode == 0
     assert "Task added successfully" in result.stdout
+    assert "[1] Buy groceries - todo" in result.stdout
+    assert read_tasks(temp_tasks)[0]["description"] == "Buy groceries"
 
-    with open(temp_tasks, "r", encoding="utf-8") as f:
-        tasks = json.load(f)
+
+def test_add_task(manager, temp_tasks, capsys):
+    manager.add_task("Buy groceries")
+    assert "Task added successfully" in capsys.readouterr().out
+
+    tasks = read_tasks(temp_tasks)
 
     assert len(tasks) == 1
     assert tasks[0]["description"] == "Buy groceries"
     assert tasks[0]["status"] == "todo"
 
 
-def test_update_task(temp_tasks):
-    run_cli_interactive(["add Old task"], cwd=temp_tasks.parent)
-    result = run_cli_interactive(["update 1 New task"], cwd=temp_tasks.parent)
+def test_update_task(manager, temp_tasks, capsys):
+    manager.add_task("Old task")
+    capsys.readouterr()
+    manager.update_task(1, "New task")
 
-    assert "updated" in result.stdout
+    assert "updated" in capsys.readouterr().out
 
-    with open(temp_tasks, "r", encoding="utf-8") as f:
-        tasks = json.load(f)
+    tasks = read_tasks(temp_tasks)
 
     assert tasks[0]["description"] == "New task"
 
 
-def test_delete_task(temp_tasks):
-    run_cli_interactive(["add Task to delete"], cwd=temp_tasks.parent)
-    result = run_cli_interactive(["delete 1"], cwd=temp_tasks.parent)
+def test_delete_task(manager, temp_tasks, capsys):
+    manager.add_task("Task to delete")
+    capsys.readouterr()
+    manager.delete_task(1)
 
-    assert "deleted" in result.stdout
+    assert "deleted" in capsys.readouterr().out
 
-    with open(temp_tasks, "r", encoding="utf-8") as f:
-        tasks = json.load(f)
+    tasks = read_tasks(temp_tasks)
 
     assert len(tasks) == 0
 
 
-def test_mark_in_progress(temp_tasks):
-    run_cli_interactive(["add Task in progress"], cwd=temp_tasks.parent)
-    result = run_cli_interactive(["mark-in-progress 1"], cwd=temp_tasks.parent)
+def test_mark_in_progress(manager, temp_tasks, capsys):
+    manager.add_task("Task in progress")
+    capsys.readouterr()
+    manager.mark_task(1, "in-progress")
 
-    assert "in-progress" in result.stdout
+    assert "in-progress" in capsys.readouterr().out
 
-    with open(temp_tasks, "r", encoding="utf-8") as f:
-        tasks = json.load(f)
+    tasks = read_tasks(temp_tasks)
 
     assert tasks[0]["status"] == "in-progress"
 
 
-def test_mark_done(temp_tasks):
-    run_cli_interactive(["add Task done"], cwd=temp_tasks.parent)
-    result = run_cli_interactive(["mark-done 1"], cwd=temp_tasks.parent)
+def test_mark_done(manager, temp_tasks, capsys):
+    manager.add_task("Task done")
+    capsys.readouterr()
+    manager.mark_task(1, "done")
 
-    assert "done" in result.stdout
+    assert "done" in capsys.readouterr().out
 
-    with open(temp_tasks, "r", encoding="utf-8") as f:
-        tasks = json.load(f)
+    tasks = read_tasks(temp_tasks)
 
     assert tasks[0]["status"] == "done"
 
 
-def test_list_tasks(temp_tasks):
-    run_cli_interactive(["add Task A", "add Task B", "mark-done 2"], cwd=temp_tasks.parent)
+def test_missing_id(manager, capsys):
+    manager.update_task(7, "Nothing")
+    manager.mark_task(7, "done")
+    manager.delete_task(7)
+
+    assert capsys.readouterr().out.count("No task found with ID=7") == 3
+
+
+def test_read_only_commands_do_not_create_file(temp_tasks, monkeypatch, capsys):
+    run_interactive(temp_tasks, ["help", "start", "list"], monkeypatch)
+
+    assert "No tasks found" in capsys.readouterr().out
+    assert not temp_tasks.exists()
+
+
+def test_interactive_usage_errors(temp_tasks, monkeypatch, capsys):
+    run_interactive(temp_tasks, ["add", "delete x", "list later", "frobnicate"], monkeypatch)
+    out = capsys.readouterr().out
+
+    assert "Usage: add <description>" in out
+    assert "Usage: delete <id>" in out
+    assert "Invalid status" in out
+    assert "Unknown command: frobnicate" in out
+
+
+def test_add_after_delete_uses_fresh_id(temp_tasks, monkeypatch, capsys):
+    run_interactive(temp_tasks, ["add Task A", "add Task B", "delete 1"], monkeypatch)
+    capsys.readouterr()
+    run_interactive(temp_tasks, ["add Task C"], monkeypatch)
+
+    assert "ID: 3" in capsys.readouterr().out
+    assert [t["id"] for t in read_tasks(temp_tasks)] == [2, 3]
+
+    # The counter survives compaction even when the highest ids are gone
+    tm = TaskManager(filename=str(temp_tasks))
+    tm.delete_task(3)
+    tm.save_tasks()
+    tm.close()
+    capsys.readouterr()
+    run_interactive(temp_tasks, ["add Task D"], monkeypatch)
+
+    assert "ID: 4" in capsys.readouterr().out
+    assert [t["id"] for t in read_tasks(temp_tasks)] == [2, 4]
+
+
+def test_list_tasks(manager, capsys):
+    manager.add_task("Task A")
+    manager.add_task("Task B")
+    manager.mark_task(2, "done")
+    capsys.readouterr()
 
     # List all
-    result_all = run_cli_interactive(["list"], cwd=temp_tasks.parent)
-    assert "Task A" in result_all.stdout
-    assert "Task B" in result_all.stdout
+    manager.list_tasks()
+    out_all = capsys.readouterr().out
+    assert "Task A" in out_all
+    assert "Task B" in out_all
+    assert [line[:3] for line in out_all.splitlines()] == ["[1]", "[2]"]
+    assert out_all.endswith(")\n")
 
     # List done
-    result_done = run_cli_interactive(["list done"], cwd=temp_tasks.parent)
-    assert "Task B" in result_done.stdout
-    assert "Task A" not in result_done.stdout
+    manager.list_tasks("done")
+    out_done = capsys.readouterr().out
+    assert "Task B" in out_done
+    assert "Task A" not in out_done
 
     # List todo
-    result_todo = run_cli_interactive(["list todo"], cwd=temp_tasks.parent)
-    assert "Task A" in result_todo.stdout
-    assert "Task B" not in result_todo.stdout
+    manager.list_tasks("todo")
+    out_todo = capsys.readouterr().out
+    assert "Task A" in out_todo
+    assert "Task B" not in out_todo
+
+
+def test_mutations_append_records(manager, temp_tasks):
+    manager.add_task("Task A")
+    manager.mark_task(1, "done")
+    manager.delete_task(1)
+
+    with open(temp_tasks, "r", encoding="utf-8") as f:
+        ops = [json.loads(line)["op"] for line in f]
+
+    assert ops == ["add", "upd", "del"]
+
+
+def test_append_after_torn_record(temp_tasks, capsys):
+    with open(temp_tasks, "w", encoding="utf-8") as f:
+        f.write('{"op":"add","task":{"id":1,"description":"Before crash","status":"todo",'
+                '"created_at":"2024-01-01 00:00:00","updated_at":""}}\n')
+        f.write('{"op":"add","ta')
+
+    tm = TaskManager(filename=str(temp_tasks))
+    tm.add_task("After crash")
+    tm.close()
+
+    reloaded = TaskManager(filename=str(temp_tasks)).tasks
+    assert [t["description"] for t in reloaded.values()] == ["Before crash", "After crash"]
+    assert "Skipping corrupted record" in capsys.readouterr().out
+
+
+def test_load_skips_record_torn_mid_character(temp_tasks, monkeypatch, capsys):
+    import task_manager.cli as cli
+
+    # Stdlib json raises UnicodeDecodeError here, not JSONDecodeError
+    monkeypatch.setattr(cli, "_loads", json.loads)
+    with open(temp_tasks, "wb") as f:
+        f.write(b'{"op":"add","task":{"id":1,"description":"Tea","status":"todo",'
+                b'"created_at":"2024-01-01 00:00:00","updated_at":""}}\n')
+        f.write(b'{"op":"add","task":{"id":2,"description":"caf\xc3')
+
+    tasks = TaskManager(filename=str(temp_tasks)).tasks
+
+    assert [t["description"] for t in tasks.values()] == ["Tea"]
+    assert "Skipping corrupted record" in capsys.readouterr().out
+
+
+def test_load_skips_malformed_records(temp_tasks, capsys):
+    good = ('{"op":"add","task":{"id":1,"description":"Keep","status":"todo",'
+            '"created_at":"2024-01-01 00:00:00","updated_at":""}}')
+    malformed = ['"oops"', "[1]", '{"op":"add"}', '{"op":"add","task":{"description":"x"}}',
+                 '{"op":"upd","id":1}', '{"op":"del"}', '{"op":"meta"}']
+    temp_tasks.write_text("\n".join([good] + malformed) + "\n", encoding="utf-8")
+
+    tm = TaskManager(filename=str(temp_tasks))
+    tm.list_tasks()
+    out = capsys.readouterr().out
+
+    assert "[1] Keep - todo" in out
+    assert out.count("Skipping corrupted record") == len(malformed)
+    assert tm._next_id == 2
+
+
+def test_undecodable_input_is_stored(temp_tasks):
+    # A non-UTF-8 byte from the terminal reaches add_task as a lone surrogate
+    result = subprocess.run(
+        [sys.executable, str(SCRIPT)],
+        cwd=temp_tasks.parent,
+        env=dict(os.environ, LC_ALL="C"),
+        capture_output=True,
+        input=b"add caf\xe9\nlist\nexit\n",
+    )
+    assert result.returncode == 0, result.stderr
+    assert b"[1] caf" in result.stdout
+    assert read_tasks(temp_tasks)[0]["description"] == "caf\udce9"
+
+
+def test_surrogate_description_round_trips(manager, temp_tasks):
+    manager.add_task("caf\udce9")
+    manager.update_task(1, "th\udce9")
+    manager.add_task("plain")
+
+    tasks = TaskManager(filename=str(temp_tasks)).tasks
+    assert [t["description"] for t in tasks.values()] == ["th\udce9", "plain"]
+
+
+def test_legacy_array_is_converted(temp_tasks, capsys):
+    legacy = [{"id": 1, "description": "Old format", "status": "todo",
+               "created_at": "2024-01-01 00:00:00", "updated_at": ""}]
+    with open(temp_tasks, "w", encoding="utf-8") as f:
+        json.dump(legacy, f, indent=4)
+    original = temp_tasks.read_bytes()
+
+    tm = TaskManager(filename=str(temp_tasks))
+    tm.list_tasks()
+    assert "Old format" in capsys.readouterr().out
+    assert temp_tasks.read_bytes() == original
+
+    tm.add_task("New format")
+    tm.close()
+    tasks = read_tasks(temp_tasks)
+    assert tasks[0] == legacy[0]
+    assert [t["id"] for t in tasks] == [1, 2]
+
+
+def test_legacy_duplicate_ids_are_renumbered(temp_tasks, capsys):
+    # add A, add B, delete 1, add C under the old len(tasks) + 1 numbering
+    legacy = [{"id": 2, "description": "B", "status": "todo",
+               "created_at": "2024-01-01 00:00:00", "updated_at": ""},
+              {"id": 2, "description": "C", "status": "done",
+               "created_at": "2024-01-02 00:00:00", "updated_at": ""}]
+    with open(temp_tasks, "w", encoding="utf-8") as f:
+        json.dump(legacy, f, indent=4)
+
+    tm = TaskManager(filename=str(temp_tasks))
+    tm.add_task("D")
+    tm.close()
+
+    assert "Duplicate task ID=2" in capsys.readouterr().out
+    tasks = read_tasks(temp_tasks)
+    assert [(t["id"], t["description"]) for t in tasks] == [(2, "B"), (3, "C"), (4, "D")]
+    assert tasks[1]["status"] == "done"
+
+
+def test_malformed_legacy_entries_mark_file_corrupted(temp_tasks, capsys):
+    temp_tasks.write_text('[{"id": 1, "description": "ok"}, "oops"]', encoding="utf-8")
+
+    assert TaskManager(filename=str(temp_tasks)).tasks == {}
+    assert "corrupted" in capsys.readouterr().out
+
+
+def test_corrupted_legacy_file_is_kept(temp_tasks, capsys):
+    temp_tasks.write_text('[{"id":1,"description":"keep me"', encoding="utf-8")
+    original = temp_tasks.read_bytes()
+
+    tm = TaskManager(filename=str(temp_tasks))
+    tm.list_tasks()
+    assert "corrupted" in capsys.readouterr().out
+    assert temp_tasks.read_bytes() == original
+
+    tm.add_task("Fresh start")
+    tm.close()
+    corrupt = Path(str(temp_tasks) + ".corrupt")
+    assert corrupt.read_bytes() == original
+    assert [t["description"] for t in read_tasks(temp_tasks)] == ["Fresh start"]
+
+    # A second unreadable file does not overwrite the first backup
+    temp_tasks.write_text('[{"id":1,"description":"keep me too"', encoding="utf-8")
+    tm = TaskManager(filename=str(temp_tasks))
+    tm.add_task("Second start")
+    tm.close()
+    assert corrupt.read_bytes() == original
+    assert "keep me too" in Path(str(temp_tasks) + ".corrupt.1").read_text(encoding="utf-8")
+
+
+def test_compact_drops_dead_records(manager, temp_tasks):
+    for i in range(40):
+        manager.add_task(f"Task {i}")
+    for i in range(1, 40):
+        manager.delete_task(i)
+
+    with open(temp_tasks, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+
+    assert len(lines) < 79
+    assert [t["description"] for t in read_tasks(temp_tasks)] == ["Task 39"]
+
+
+def test_save_tasks_replaces_file(manager, temp_tasks):
+    manager.add_task("Task A")
+    manager.add_task("Task B")
+    manager.delete_task(1)
+    manager.save_tasks()
+
+    assert not os.path.exists(str(temp_tasks) + ".tmp")
+    with open(temp_tasks, "r", encoding="utf-8") as f:
+        assert [json.loads(line)["op"] for line in f] == ["meta", "add"]
+    assert [t["description"] for t in read_tasks(temp_tasks)] == ["Task B"]
+
+    manager.add_task("Task C")
+    assert [t["id"] for t in read_tasks(temp_tasks)] == [2, 3]
+
+
+def test_numba_filter_matches_python(manager, monkeypatch, capsys):
+    pytest.importorskip("numba")
+    import task_manager.cli as cli
+
+    for i in range(1, 31):
+        manager.add_task(f"Task {i}")
+        if i % 3 == 0:
+            manager.mark_task(i, "done")
+    # Statuses outside STATUSES, as in a hand-edited file
+    manager.tasks[1]["status"] = "archived"
+    manager.tasks[2]["status"] = "someday"
+    capsys.readouterr()
+
+    queries = ["done", "todo", "in-progress", "archived", "blocked"]
+    expected = {}
+    for status in queries:
+        manager.list_tasks(status)
+        expected[status] = capsys.readouterr().out
+
+    monkeypatch.setattr(cli, "NUMBA_THRESHOLD", 0)
+    assert manager._filter_compiled("done") is not None
+    for status in queries:
+        manager.list_tasks(status)
+        assert capsys.readouterr().out == expected[status]
+    assert "[1] Task 1 - archived" in expected["archived"]
+    assert "No tasks found" in expected["blocked"]
+
+
+def test_import_does_not_load_numba():
+    code = "import sys, task_manager.cli; print('numba' in sys.modules, 'numpy' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=SCRIPT.parent.parent,
+        text=True,
+        capture_output=True,
+    )
+    assert result.stdout.strip() == "False False"
+
+
+def test_use_emoji_off_strips_all_warnings(temp_tasks):
+    env = dict(os.environ, USE_EMOJI="0")
+    result = subprocess.run(
+        [sys.executable, str(SCRIPT)],
+        cwd=temp_tasks.parent,
+        env=env,
+        text=True,
+        encoding="utf-8",
+        capture_output=True,
+        input="add\nlist later\nfrobnicate\ndelete 9\nexit\n",
+    )
+    assert "Usage: add <description>" in result.stdout
+    assert "Unknown command: frobnicate" in result.stdout
+    assert "⚠️" not in result.stdout